@@ -1,10 +1,58 @@
-from fastapi import FastAPI
+import os
+import secrets
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
 from fastapi.responses import HTMLResponse
-from inference_onnx import OnnxInference
+from scheduler import TokenBudgetScheduler, threads_per_run
 
-app = FastAPI(title="MLOps Practice - Paraphrase Detection ONNX Inference API")
+BACKEND = os.getenv("INFERENCE_BACKEND", "onnx")
+# /admin/* endpoints are disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Upper bound on a profiling window, since ORT keeps every event in memory
+MAX_PROFILE_RUNS = int(os.getenv("ORT_PROFILE_MAX_RUNS", "1000"))
 
-predictor = OnnxInference("./models/mrpc_model.onnx")
+WORKERS_PER_BUCKET = int(os.getenv("SCHEDULER_WORKERS_PER_BUCKET", "1"))
+# Split the cores between every model run that can execute at once: one per
+# bucket worker, in each uvicorn worker process
+INTRA_OP_NUM_THREADS = int(
+    os.getenv("INTRA_OP_NUM_THREADS")
+    or threads_per_run(
+        workers_per_bucket=WORKERS_PER_BUCKET,
+        processes=int(os.getenv("WORKERS", "1")),
+    )
+)
+
+if BACKEND == "onnx":
+    from inference_onnx import OnnxInference
+
+    predictor = OnnxInference(
+        os.getenv("MODEL_PATH", "./models/mrpc_model.onnx"),
+        num_threads=INTRA_OP_NUM_THREADS,
+    )
+    if os.getenv("ORT_PROFILE_RUNS"):
+        predictor.start_profiling(
+            min(int(os.getenv("ORT_PROFILE_RUNS")), MAX_PROFILE_RUNS)
+        )
+elif BACKEND == "torch":
+    from inference import Inference
+
+    predictor = Inference(
+        os.getenv("MODEL_PATH", "./models/best_checkpoint.ckpt"),
+        num_threads=os.getenv("TORCH_NUM_THREADS") or INTRA_OP_NUM_THREADS,
+        compile_mode=os.getenv("TORCH_COMPILE_MODE"),
+    )
+else:
+    raise ValueError(f"Unknown INFERENCE_BACKEND: {BACKEND}")
+
+scheduler = TokenBudgetScheduler(
+    predictor,
+    token_budget=int(os.getenv("SCHEDULER_TOKEN_BUDGET", "4096")),
+    max_wait_ms=float(os.getenv("SCHEDULER_MAX_WAIT_MS", "5")),
+    workers_per_bucket=WORKERS_PER_BUCKET,
+)
+
+app = FastAPI(
+    title=f"MLOps Practice - Paraphrase Detection {BACKEND.upper()} Inference API"
+)
 
 
 @app.get("/predict/")
@@ -15,7 +63,7 @@ async def predict(sentence1: str, sentence2: str):
     - **sentence1**: First sentence
     - **sentence2**: Second sentence
     """
-    result = predictor.predict(sentence1, sentence2)
+    result = await scheduler.submit(sentence1, sentence2)
     predicted_label = max(result, key=lambda x: x["score"])
     return {
         "sentence1": sentence1,
@@ -25,6 +73,58 @@ async def predict(sentence1: str, sentence2: str):
     }
 
 
+@app.get("/stats/")
+async def stats():
+    """
+    Per-bucket batch sizes and latency histograms from the serving scheduler.
+    """
+    return scheduler.stats()
+
+
+def require_admin(x_admin_token: str = Header(None)):
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(
+        x_admin_token, ADMIN_TOKEN
+    ):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/admin/profile/", dependencies=[Depends(require_admin)])
+def start_profiling(num_runs: int = Query(100, ge=1, le=MAX_PROFILE_RUNS)):
+    """
+    Profile the next `num_runs` ONNX Runtime session runs. The trace and a
+    per-operator summary are written to a new outputs/ run directory.
+
+    Profiling is per worker process: with `uvicorn --workers N` this starts a
+    window only in the worker that receives the call, and GET reports on
+    whichever worker answers it.
+
+    Requires the `X-Admin-Token` header to match ADMIN_TOKEN.
+    """
+    if not hasattr(predictor, "start_profiling"):
+        raise HTTPException(
+            status_code=400, detail="Profiling is only available for the onnx backend"
+        )
+    try:
+        predictor.start_profiling(num_runs)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return predictor.profiling_status()
+
+
+@app.get("/admin/profile/", dependencies=[Depends(require_admin)])
+async def profiling_status():
+    """
+    Status of this worker's profiling window and its last trace.
+    """
+    if not hasattr(predictor, "profiling_status"):
+        raise HTTPException(
+            status_code=400, detail="Profiling is only available for the onnx backend"
+        )
+    return predictor.profiling_status()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def home():
     return """
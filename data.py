@@ -1,8 +1,10 @@
+import os
+import shutil
 import torch
 import datasets
 import pytorch_lightning as pl
 
-from datasets import load_dataset
+from datasets import DatasetDict, load_dataset, load_from_disk
 from transformers import AutoTokenizer
 
 
@@ -12,10 +14,13 @@ class mrpcData(pl.LightningDataModule):
         model_name="google/bert_uncased_L-2_H-128_A-2",
         batch_size=32,
         max_length=512,
+        cache_dir=None,
     ):
         super().__init__()
+        self.model_name = model_name
         self.batch_size = batch_size
         self.max_length = max_length
+        self.cache_dir = cache_dir
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
 
     def prepare_data(self):
@@ -30,10 +35,45 @@ class mrpcData(pl.LightningDataModule):
             max_length=self.max_length,
         )
 
-    def setup(self, stage=None):
+    def cache_path(self):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(
+            self.cache_dir, f"{self.model_name.replace('/', '__')}_{self.max_length}"
+        )
+
+    def tokenized_dataset(self):
+        """
+        Tokenized train/validation splits, read from `cache_dir` when a copy for
+        this tokenizer and max_length was already saved there.
+        """
+        cache_path = self.cache_path()
+        if cache_path is not None and os.path.isdir(cache_path):
+            return load_from_disk(cache_path)
+
         dataset = load_dataset("glue", "mrpc")
-        self.train_data = dataset["train"].map(self.tokenize_data, batched=True)
-        self.val_data = dataset["validation"].map(self.tokenize_data, batched=True)
+        tokenized = DatasetDict(
+            {
+                split: dataset[split].map(self.tokenize_data, batched=True)
+                for split in ["train", "validation"]
+            }
+        )
+        if cache_path is not None:
+            # Write to a temporary dir first so concurrent readers never see a
+            # partially saved copy
+            tmp_path = f"{cache_path}.tmp{os.getpid()}"
+            tokenized.save_to_disk(tmp_path)
+            try:
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                # Another process saved the same copy first
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        return tokenized
+
+    def setup(self, stage=None):
+        dataset = self.tokenized_dataset()
+        self.train_data = dataset["train"]
+        self.val_data = dataset["validation"]
 
         self.train_data.set_format(
             type="torch", columns=["input_ids", "attention_mask", "label"]
@@ -0,0 +1,305 @@
+import csv
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LABELS = ["not_paraphrase", "paraphrase"]
+
+
+def _normalize_case(case, default_category):
+    """
+    Coerce a raw test case into {category, sentence1, sentence2, expected, note}.
+
+    `expected` may be given as a label name or, as in the GLUE files, as an
+    integer `label` column (0 = not_paraphrase, 1 = paraphrase). Any other
+    label, such as the -1 GLUE uses for its hidden test labels, is "unknown".
+    """
+    expected = case.get("expected")
+    if expected is None and case.get("label") not in (None, ""):
+        label = int(case["label"])
+        if label in range(len(LABELS)):
+            expected = LABELS[label]
+    return {
+        "category": case.get("category") or default_category,
+        "sentence1": case["sentence1"],
+        "sentence2": case["sentence2"],
+        "expected": expected or "unknown",
+        "note": case.get("note", ""),
+    }
+
+
+def load_test_cases(source=None):
+    """
+    Load test cases grouped by category.
+
+    - None: the built-in suite from inference_test.get_test_examples()
+    - glue/mrpc:<split>: an MRPC split from the HF hub
+    - *.json: either {category: [cases]} or a flat list of cases
+    - *.jsonl: one case per line
+    - *.csv / *.tsv: one case per row
+
+    Flat formats may carry a `category` field, otherwise the file name is used.
+    """
+    if source is None:
+        from inference_test import get_test_examples
+
+        raw = get_test_examples()
+    elif source.startswith("glue/mrpc"):
+        from datasets import load_dataset
+
+        split = source.partition(":")[2] or "validation"
+        raw = {f"mrpc_{split}": list(load_dataset("glue", "mrpc", split=split))}
+    elif source.endswith(".json"):
+        with open(source) as f:
+            raw = json.load(f)
+    elif source.endswith(".jsonl"):
+        with open(source) as f:
+            raw = [json.loads(line) for line in f if line.strip()]
+    elif source.endswith((".csv", ".tsv")):
+        delimiter = "\t" if source.endswith(".tsv") else ","
+        with open(source, newline="") as f:
+            raw = list(csv.DictReader(f, delimiter=delimiter))
+    else:
+        raise ValueError(f"Unsupported test set format: {source}")
+
+    if isinstance(raw, list):
+        default_category = "default" if source is None else source.rsplit("/", 1)[-1]
+        raw = {None: [_normalize_case(case, default_category) for case in raw]}
+    else:
+        raw = {
+            category: [_normalize_case(case, category) for case in cases]
+            for category, cases in raw.items()
+        }
+
+    test_cases = {}
+    for cases in raw.values():
+        for case in cases:
+            test_cases.setdefault(case["category"], []).append(case)
+    return test_cases
+
+
+def predict_batch(predictor, pairs):
+    """
+    Score a batch with any predictor, falling back to one predict() call per
+    pair for predictors that don't implement predict_batch().
+    """
+    if hasattr(predictor, "predict_batch"):
+        return predictor.predict_batch(pairs)
+    return [predictor.predict(sentence1, sentence2) for sentence1, sentence2 in pairs]
+
+
+def _latency_stats(batch_latencies, num_examples, wall_time):
+    if not batch_latencies:
+        return {
+            "num_batches": 0,
+            "batch_ms_mean": None,
+            "batch_ms_p50": None,
+            "batch_ms_p90": None,
+            "batch_ms_p99": None,
+            "batch_ms_max": None,
+            "example_ms_mean": None,
+            "wall_time_s": wall_time,
+            "throughput_per_s": 0.0,
+        }
+
+    latencies = np.asarray(batch_latencies) * 1000
+    return {
+        "num_batches": len(batch_latencies),
+        "batch_ms_mean": float(latencies.mean()),
+        "batch_ms_p50": float(np.percentile(latencies, 50)),
+        "batch_ms_p90": float(np.percentile(latencies, 90)),
+        "batch_ms_p99": float(np.percentile(latencies, 99)),
+        "batch_ms_max": float(latencies.max()),
+        "example_ms_mean": float(latencies.sum() / num_examples),
+        "wall_time_s": wall_time,
+        "throughput_per_s": num_examples / wall_time if wall_time > 0 else 0.0,
+    }
+
+
+def evaluate(predictor, test_cases, batch_size=32, num_workers=1, warmup=1):
+    """
+    Score every case in `test_cases` in batches of `batch_size`, running up to
+    `num_workers` batches concurrently, and return a JSON-serialisable report
+    with per-category accuracy, latency stats and the individual predictions.
+    """
+    cases = [case for category_cases in test_cases.values() for case in category_cases]
+    batches = [cases[i : i + batch_size] for i in range(0, len(cases), batch_size)]
+
+    # Keep one-off session/graph initialisation out of the latency numbers
+    for batch in batches[:warmup]:
+        predict_batch(predictor, [(c["sentence1"], c["sentence2"]) for c in batch])
+
+    def run_batch(batch):
+        start = time.perf_counter()
+        results = predict_batch(
+            predictor, [(c["sentence1"], c["sentence2"]) for c in batch]
+        )
+        return results, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        batch_outputs = list(executor.map(run_batch, batches))
+    wall_time = time.perf_counter() - start
+
+    predictions = []
+    category_results = {}
+    for batch, (results, _) in zip(batches, batch_outputs):
+        for case, result in zip(batch, results):
+            predicted_label = max(result, key=lambda x: x["score"])
+            # Unlabelled cases are still scored (and diffed) but not counted
+            # towards accuracy
+            correct = (
+                None
+                if case["expected"] == "unknown"
+                else predicted_label["label"] == case["expected"]
+            )
+            predictions.append(
+                {
+                    **case,
+                    "predicted": predicted_label["label"],
+                    "confidence": predicted_label["score"],
+                    "correct": correct,
+                }
+            )
+            stats = category_results.setdefault(
+                case["category"], {"correct": 0, "total": 0, "unlabeled": 0}
+            )
+            if correct is None:
+                stats["unlabeled"] += 1
+            else:
+                stats["correct"] += int(correct)
+                stats["total"] += 1
+
+    for stats in category_results.values():
+        stats["accuracy"] = (
+            stats["correct"] / stats["total"] * 100 if stats["total"] > 0 else None
+        )
+
+    total_correct = sum(r["correct"] for r in category_results.values())
+    total = sum(r["total"] for r in category_results.values())
+    return {
+        "categories": category_results,
+        "overall": {
+            "correct": total_correct,
+            "total": total,
+            "unlabeled": len(predictions) - total,
+            "accuracy": total_correct / total * 100 if total > 0 else None,
+        },
+        "latency": _latency_stats(
+            [latency for _, latency in batch_outputs], len(predictions), wall_time
+        ),
+        "predictions": predictions,
+    }
+
+
+def compare(predictor_a, predictor_b, test_cases, **kwargs):
+    """
+    Evaluate two predictors on the same cases and list every example where
+    their predicted labels disagree.
+    """
+    report_a = evaluate(predictor_a, test_cases, **kwargs)
+    report_b = evaluate(predictor_b, test_cases, **kwargs)
+
+    disagreements = [
+        {
+            "category": pred_a["category"],
+            "sentence1": pred_a["sentence1"],
+            "sentence2": pred_a["sentence2"],
+            "expected": pred_a["expected"],
+            "predicted_a": pred_a["predicted"],
+            "confidence_a": pred_a["confidence"],
+            "predicted_b": pred_b["predicted"],
+            "confidence_b": pred_b["confidence"],
+        }
+        for pred_a, pred_b in zip(report_a["predictions"], report_b["predictions"])
+        if pred_a["predicted"] != pred_b["predicted"]
+    ]
+    total = len(report_a["predictions"])
+    return {
+        "a": report_a,
+        "b": report_b,
+        "agreement": (total - len(disagreements)) / total * 100 if total > 0 else 0,
+        "disagreements": disagreements,
+    }
+
+
+def load_predictor(model_path):
+    """
+    Pick the backend from the artifact: *.onnx (including quantized exports)
+    goes to OnnxInference, anything else is treated as a PyTorch checkpoint.
+    """
+    if model_path.endswith(".onnx"):
+        from inference_onnx import OnnxInference
+
+        return OnnxInference(model_path)
+
+    from inference import Inference
+
+    return Inference(model_path)
+
+
+def _strip_predictions(report):
+    return {k: v for k, v in report.items() if k != "predictions"}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Batched evaluation harness")
+    parser.add_argument("--model", default="./models/mrpc_model.onnx")
+    parser.add_argument(
+        "--compare", default=None, help="Second model artifact to diff against"
+    )
+    parser.add_argument(
+        "--test-set",
+        default=None,
+        help="json/jsonl/csv/tsv file or glue/mrpc:<split> (default: built-in suite)",
+    )
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument(
+        "--include-predictions",
+        action="store_true",
+        help="Keep per-example predictions in the report",
+    )
+    args = parser.parse_args()
+
+    test_cases = load_test_cases(args.test_set)
+    logger.info(
+        f"Loaded {sum(len(c) for c in test_cases.values())} cases "
+        f"in {len(test_cases)} categories"
+    )
+
+    eval_kwargs = {"batch_size": args.batch_size, "num_workers": args.workers}
+    if args.compare:
+        report = compare(
+            load_predictor(args.model),
+            load_predictor(args.compare),
+            test_cases,
+            **eval_kwargs,
+        )
+        report["a"]["model"] = args.model
+        report["b"]["model"] = args.compare
+        if not args.include_predictions:
+            report["a"] = _strip_predictions(report["a"])
+            report["b"] = _strip_predictions(report["b"])
+    else:
+        report = evaluate(load_predictor(args.model), test_cases, **eval_kwargs)
+        report["model"] = args.model
+        if not args.include_predictions:
+            report = _strip_predictions(report)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        logger.info(f"Report written to {args.output}")
+    else:
+        print(output)
@@ -1,42 +1,165 @@
+import os
 import torch
-from model import mrpcModel
-from transformers import AutoTokenizer
+import logging
+import torch.nn as nn
+from transformers import (
+    AutoConfig,
+    AutoModelForSequenceClassification,
+    AutoTokenizer,
+)
+
+logger = logging.getLogger(__name__)
+
+# Used to trace the model and to check the traced graph on a different shape
+TRACE_EXAMPLES = [
+    ("The firm announced increased earnings.", "The company reported higher profits."),
+    ("The cat sat on the mat.", "A feline rested on the rug."),
+    (
+        "The meeting that was originally planned for Monday has been moved to "
+        "Thursday afternoon because several members are travelling.",
+        "Several members are away, so the meeting has been rescheduled from "
+        "Monday to Thursday afternoon.",
+    ),
+]
+
+
+class _LogitsWrapper(nn.Module):
+    """Exposes only the logits tensor so the classifier can be traced/compiled."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(
+            input_ids=input_ids, attention_mask=attention_mask, return_dict=False
+        )[0]
 
 
 class Inference:
-    def __init__(self, model_path):
+    def __init__(self, model_path, num_threads=None, compile_mode=None, max_length=512):
+        """
+        - **model_path**: Lightning checkpoint (.ckpt) or a save_pretrained() directory
+        - **num_threads**: intra-op threads for CPU inference (torch default if None)
+        - **compile_mode**: None for eager, "trace" for TorchScript, "compile" for torch.compile
+        - **max_length**: truncation length; batches are padded to their longest pair,
+          or to max_length if the traced graph doesn't generalise across shapes
+        """
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        if num_threads:
+            torch.set_num_threads(int(num_threads))
 
         self.model_path = model_path
-        self.model = mrpcModel.load_from_checkpoint(model_path).to(self.device)
-        self.model.eval()
-
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model.hparams.model_name)
+        self.max_length = max_length
+        self.padding = "longest"
         self.labels = ["not_paraphrase", "paraphrase"]
 
-    def predict(self, sentence1, sentence2):
-        inference_data = {"sentence1": sentence1, "sentence2": sentence2}
+        if os.path.isdir(model_path):
+            model_name = model_path
+            classifier = AutoModelForSequenceClassification.from_pretrained(model_path)
+        else:
+            model_name, classifier = self._load_from_checkpoint(model_path)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = _LogitsWrapper(classifier).to(self.device).eval()
+
+        if compile_mode == "trace":
+            self.model = self._trace(self.model)
+        elif compile_mode == "compile":
+            self.model = torch.compile(self.model, dynamic=True)
+        elif compile_mode is not None:
+            raise ValueError(f"Unknown compile_mode: {compile_mode}")
+
+    def _load_from_checkpoint(self, model_path):
+        # Build the bare HF classifier from its config and copy in the `bert.*`
+        # weights, skipping mrpcModel (torchmetrics, wandb) and the optimizer state
+        checkpoint = torch.load(model_path, map_location="cpu", weights_only=False)
+        model_name = checkpoint["hyper_parameters"]["model_name"]
+
+        config = AutoConfig.from_pretrained(model_name, num_labels=2)
+        classifier = AutoModelForSequenceClassification.from_config(config)
+        state_dict = {
+            key[len("bert.") :]: value
+            for key, value in checkpoint["state_dict"].items()
+            if key.startswith("bert.")
+        }
+        classifier.load_state_dict(state_dict)
+        return model_name, classifier
+
+    def encode(self, pairs):
+        """
+        Tokenize (sentence1, sentence2) pairs without padding, one
+        {input_ids, attention_mask} dict per pair.
+        """
         tokenized_data = self.tokenizer(
-            inference_data["sentence1"],
-            inference_data["sentence2"],
+            [sentence1 for sentence1, _ in pairs],
+            [sentence2 for _, sentence2 in pairs],
             truncation=True,
-            padding="max_length",
-            max_length=512,
-            return_tensors="pt",
+            max_length=self.max_length,
         )
+        return [
+            {"input_ids": input_ids, "attention_mask": attention_mask}
+            for input_ids, attention_mask in zip(
+                tokenized_data["input_ids"], tokenized_data["attention_mask"]
+            )
+        ]
 
-        tokenized_data = {k: v.to(self.device) for k, v in tokenized_data.items()}
+    def _pad(self, features):
+        padded = self.tokenizer.pad(
+            features,
+            padding=self.padding,
+            max_length=self.max_length,
+            return_tensors="pt",
+        )
+        return (
+            padded["input_ids"].to(self.device),
+            padded["attention_mask"].to(self.device),
+        )
 
+    def _trace(self, model):
+        # Trace on one short pair and check the graph against eager mode on a
+        # batch with a different size and sequence length. If shapes got baked
+        # in, fall back to padding every batch to max_length so only the batch
+        # dimension varies.
         with torch.no_grad():
-            logits = self.model(
-                tokenized_data["input_ids"],
-                tokenized_data["attention_mask"],
+            try:
+                return torch.jit.trace(
+                    model,
+                    self._pad(self.encode(TRACE_EXAMPLES[:1])),
+                    check_inputs=[self._pad(self.encode(TRACE_EXAMPLES))],
+                )
+            except (torch.jit.TracingCheckError, RuntimeError) as e:
+                logger.warning(
+                    f"Traced model does not generalise across sequence lengths, "
+                    f"padding to max_length={self.max_length}: {e}"
+                )
+
+            self.padding = "max_length"
+            return torch.jit.trace(
+                model,
+                self._pad(self.encode(TRACE_EXAMPLES[:1])),
+                check_inputs=[self._pad(self.encode(TRACE_EXAMPLES))],
             )
-            probs = torch.softmax(logits, dim=-1)[0]
+
+    def predict(self, sentence1, sentence2):
+        return self.predict_batch([(sentence1, sentence2)])[0]
+
+    def predict_batch(self, pairs):
+        return self.predict_encoded(self.encode(pairs))
+
+    def predict_encoded(self, features):
+        input_ids, attention_mask = self._pad(features)
+
+        with torch.inference_mode():
+            logits = self.model(input_ids, attention_mask)
+            batch_probs = torch.softmax(logits, dim=-1).cpu()
 
         return [
-            {"label": label, "score": float(score)}
-            for label, score in zip(self.labels, probs)
+            [
+                {"label": label, "score": float(score)}
+                for label, score in zip(self.labels, probs)
+            ]
+            for probs in batch_probs
         ]
 
 
@@ -1,35 +1,192 @@
+import os
+import logging
+import threading
 import numpy as np
 import onnxruntime as ort
 from scipy.special import softmax
 from data import mrpcData
+from profiling import make_run_dir, write_ort_summary
+
+logger = logging.getLogger(__name__)
 
 
 class OnnxInference:
-    def __init__(self, model_path):
-        providers = ["CPUExecutionProvider", "CUDAExecutionProvider"]
-        self.ort_session = ort.InferenceSession(model_path, providers=providers)
-        self.processor = mrpcData()
+    def __init__(
+        self,
+        model_path,
+        model_name="google/bert_uncased_L-2_H-128_A-2",
+        max_length=512,
+        num_threads=None,
+    ):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.providers = ["CPUExecutionProvider", "CUDAExecutionProvider"]
+        self.ort_session = ort.InferenceSession(
+            model_path, sess_options=self._session_options(), providers=self.providers
+        )
+        self.processor = mrpcData(model_name=model_name, max_length=max_length)
         self.labels = ["not_paraphrase", "paraphrase"]
 
+        self._profile_lock = threading.Lock()
+        self._profile_session = None
+        self._profile_runs_left = 0
+        self._profile_in_flight = 0
+        self._profile_starting = False
+        self._profile_finishing = False
+        self.last_profile = None
+
+    def _session_options(self):
+        options = ort.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = int(self.num_threads)
+        return options
+
+    def _profiling_busy(self):
+        return (
+            self._profile_starting
+            or self._profile_session is not None
+            or self._profile_in_flight > 0
+            or self._profile_finishing
+        )
+
+    def start_profiling(self, num_runs, output_dir=None):
+        """
+        Route the next `num_runs` session runs through a separate session with
+        ONNX Runtime profiling enabled. When the window closes the trace and a
+        per-operator summary are written to `output_dir` (a new outputs/ run
+        dir by default) and the regular session is used again.
+
+        The window covers this process only; under `uvicorn --workers N` each
+        worker profiles the requests it serves.
+        """
+        with self._profile_lock:
+            if self._profiling_busy():
+                raise RuntimeError("A profiling window is already active")
+            self._profile_starting = True
+
+        try:
+            output_dir = output_dir or make_run_dir()
+            options = self._session_options()
+            options.enable_profiling = True
+            options.profile_file_prefix = os.path.join(
+                output_dir, "onnxruntime_profile"
+            )
+            session = ort.InferenceSession(
+                self.model_path, sess_options=options, providers=self.providers
+            )
+        except Exception:
+            with self._profile_lock:
+                self._profile_starting = False
+            raise
+
+        with self._profile_lock:
+            self._profile_session = session
+            self._profile_runs_left = num_runs
+            self._profile_starting = False
+
+    def profiling_status(self):
+        return {
+            "active": self._profiling_busy(),
+            "runs_left": self._profile_runs_left,
+            "last_profile": self.last_profile,
+        }
+
+    def _run(self, inputs):
+        with self._profile_lock:
+            session = self._profile_session
+            if session is not None:
+                self._profile_in_flight += 1
+                self._profile_runs_left -= 1
+                if self._profile_runs_left <= 0:
+                    self._profile_session = None
+        if session is None:
+            return self.ort_session.run(None, inputs)
+
+        try:
+            return session.run(None, inputs)
+        finally:
+            # End profiling only once the window has closed and no other thread
+            # is still running on the profiling session
+            with self._profile_lock:
+                self._profile_in_flight -= 1
+                finished = (
+                    self._profile_session is None and self._profile_in_flight == 0
+                )
+                if finished:
+                    self._profile_finishing = True
+            if finished:
+                # Writing the trace and summary is off the request path, and a
+                # failure there must never fail the request being served
+                threading.Thread(
+                    target=self._finish_profiling, args=(session,), daemon=True
+                ).start()
+
+    def _finish_profiling(self, session):
+        try:
+            trace_path = session.end_profiling()
+            self.last_profile = {
+                "trace": trace_path,
+                "summary": write_ort_summary(trace_path),
+            }
+        except Exception as e:
+            logger.exception("Failed to write the ONNX Runtime profile")
+            self.last_profile = {"error": str(e)}
+        finally:
+            with self._profile_lock:
+                self._profile_finishing = False
+
     def predict(self, sentence1, sentence2):
-        inference_data = {"sentence1": sentence1, "sentence2": sentence2}
-        tokenizd_data = self.processor.tokenize_data(inference_data)
+        return self.predict_batch([(sentence1, sentence2)])[0]
+
+    def encode(self, pairs):
+        """
+        Tokenize (sentence1, sentence2) pairs without padding, one
+        {input_ids, attention_mask} dict per pair.
+
+        Every call uses the same truncation/padding settings, so the fast
+        tokenizer's backend state is never reconfigured between calls.
+        """
+        tokenizd_data = self.processor.tokenizer(
+            [sentence1 for sentence1, _ in pairs],
+            [sentence2 for _, sentence2 in pairs],
+            truncation=True,
+            max_length=self.processor.max_length,
+        )
+        return [
+            {"input_ids": input_ids, "attention_mask": attention_mask}
+            for input_ids, attention_mask in zip(
+                tokenizd_data["input_ids"], tokenizd_data["attention_mask"]
+            )
+        ]
+
+    def predict_encoded(self, features):
+        """
+        Score pairs already tokenized by encode() in a single session run.
+
+        Pairs are padded to the longest one in the batch rather than to
+        max_length, since the exported graph has a dynamic sequence axis.
+        """
+        padded = self.processor.tokenizer.pad(
+            features, padding="longest", return_tensors="np"
+        )
 
         inputs = {
-            "input_ids": np.expand_dims(tokenizd_data["input_ids"], axis=0).astype(
-                np.int64
-            ),
-            "attention_mask": np.expand_dims(
-                tokenizd_data["attention_mask"], axis=0
-            ).astype(np.int64),
+            "input_ids": padded["input_ids"].astype(np.int64),
+            "attention_mask": padded["attention_mask"].astype(np.int64),
         }
 
-        outputs = self.ort_session.run(None, inputs)
-        scores = softmax(outputs[0][0])
-        preds = []
-        for score, label in zip(scores, self.labels):
-            preds.append({"label": label, "score": float(score)})
-        return preds
+        outputs = self._run(inputs)
+        batch_scores = softmax(outputs[0], axis=-1)
+        return [
+            [
+                {"label": label, "score": float(score)}
+                for score, label in zip(scores, self.labels)
+            ]
+            for scores in batch_scores
+        ]
+
+    def predict_batch(self, pairs):
+        return self.predict_encoded(self.encode(pairs))
 
 
 if __name__ == "__main__":
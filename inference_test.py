@@ -1,4 +1,5 @@
 from inference_onnx import OnnxInference
+from evaluation import evaluate, load_test_cases
 
 
 def get_test_examples():
@@ -158,89 +159,59 @@ def get_test_examples():
     return test_cases
 
 
-def run_tests(predictor):
+def _fmt(value, spec):
+    # Accuracy and latency are None for unlabelled categories / empty test sets
+    return "-" if value is None else format(value, spec)
+
+
+def run_tests(predictor, batch_size=32):
     """
-    Run all test cases and display results
+    Run all test cases through the batched evaluation harness and display results
     """
-    test_cases = get_test_examples()
+    report = evaluate(predictor, load_test_cases(), batch_size=batch_size)
 
     print("=" * 80)
     print("PARAPHRASE DETECTION TEST SUITE")
     print("=" * 80)
 
-    total_tests = 0
-    category_results = {}
-
-    for category, cases in test_cases.items():
-        print(f"\n{'=' * 80}")
-        print(f"Category: {category.upper()}")
-        print(f"{'=' * 80}\n")
-
-        correct = 0
-        total = len(cases)
-
-        for i, case in enumerate(cases, 1):
-            sentence1 = case["sentence1"]
-            sentence2 = case["sentence2"]
-            expected = case.get("expected", "unknown")
-            note = case.get("note", "")
-
-            print(f"Test {i}/{total}:")
-            print(f"  S1: {sentence1}")
-            print(f"  S2: {sentence2}")
-
-            try:
-                result = predictor.predict(sentence1, sentence2)
-                predicted_label = max(result, key=lambda x: x["score"])
-
-                print(f"  Results: {result}")
-                print(
-                    f"  Predicted: {predicted_label['label']} (confidence: {predicted_label['score']:.4f})"
-                )
-                print(f"  Expected: {expected}")
-
-                if predicted_label["label"] == expected:
-                    print("PASS")
-                    correct += 1
-                else:
-                    print("FAIL")
-
-                if note:
-                    print(f"  Note: {note}")
-
-            except Exception as e:
-                print(f"  ✗ ERROR: {str(e)}")
-
-            print()
-
-        accuracy = (correct / total) * 100 if total > 0 else 0
-        category_results[category] = {
-            "correct": correct,
-            "total": total,
-            "accuracy": accuracy,
-        }
-        total_tests += total
-
-        print(f"Category Results: {correct}/{total} correct ({accuracy:.1f}%)")
+    failures = [p for p in report["predictions"] if p["correct"] is False]
+    if failures:
+        print("\nFAILURES\n")
+    for failure in failures:
+        print(f"[{failure['category']}]")
+        print(f"  S1: {failure['sentence1']}")
+        print(f"  S2: {failure['sentence2']}")
+        print(
+            f"  Predicted: {failure['predicted']} (confidence: {failure['confidence']:.4f})"
+        )
+        print(f"  Expected: {failure['expected']}")
+        if failure["note"]:
+            print(f"  Note: {failure['note']}")
+        print()
 
     # Overall summary
     print("\n" + "=" * 80)
     print("OVERALL SUMMARY")
     print("=" * 80)
 
-    total_correct = sum(r["correct"] for r in category_results.values())
-    overall_accuracy = (total_correct / total_tests) * 100 if total_tests > 0 else 0
-
-    for category, results in category_results.items():
+    for category, results in report["categories"].items():
         print(
-            f"{category:20s}: {results['correct']:2d}/{results['total']:2d} ({results['accuracy']:5.1f}%)"
+            f"{category:20s}: {results['correct']:2d}/{results['total']:2d} ({_fmt(results['accuracy'], '5.1f')}%)"
         )
 
+    overall = report["overall"]
     print(
-        f"\n{'TOTAL':20s}: {total_correct:2d}/{total_tests:2d} ({overall_accuracy:5.1f}%)"
+        f"\n{'TOTAL':20s}: {overall['correct']:2d}/{overall['total']:2d} ({_fmt(overall['accuracy'], '5.1f')}%)"
+    )
+    latency = report["latency"]
+    print(
+        f"{'LATENCY':20s}: {_fmt(latency['example_ms_mean'], '.2f')} ms/example, "
+        f"p99 batch {_fmt(latency['batch_ms_p99'], '.2f')} ms"
     )
     print("=" * 80)
 
+    return report
+
 
 if __name__ == "__main__":
     # Initialize predictor
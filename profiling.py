@@ -0,0 +1,69 @@
+import os
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def make_run_dir(root="outputs"):
+    """
+    Create an outputs/<date>/<time>-<pid> directory, mirroring Hydra's run dir
+    layout. The pid keeps server worker processes that profile in the same
+    second from writing into each other's directory.
+    """
+    run_dir = os.path.join(
+        root, time.strftime("%Y-%m-%d"), f"{time.strftime('%H-%M-%S')}-{os.getpid()}"
+    )
+    os.makedirs(run_dir, exist_ok=True)
+    return run_dir
+
+
+def summarize_ort_trace(trace_path):
+    """
+    Aggregate kernel time per operator type from an ONNX Runtime profile,
+    sorted by total time.
+    """
+    with open(trace_path) as f:
+        events = json.load(f)
+
+    ops = {}
+    for event in events:
+        if event.get("cat") != "Node" or not event.get("name", "").endswith(
+            "_kernel_time"
+        ):
+            continue
+        op_name = event.get("args", {}).get("op_name", "unknown")
+        stats = ops.setdefault(op_name, {"op": op_name, "calls": 0, "total_us": 0})
+        stats["calls"] += 1
+        stats["total_us"] += event.get("dur", 0)
+
+    grand_total = sum(stats["total_us"] for stats in ops.values()) or 1
+    summary = sorted(ops.values(), key=lambda x: x["total_us"], reverse=True)
+    for stats in summary:
+        stats["mean_us"] = stats["total_us"] / stats["calls"]
+        stats["percent"] = stats["total_us"] / grand_total * 100
+    return summary
+
+
+def format_summary(summary, row_limit=30):
+    lines = [
+        f"{'Operator':30s} {'Calls':>8s} {'Total (ms)':>12s} {'Mean (us)':>12s} {'%':>7s}",
+        "-" * 73,
+    ]
+    for stats in summary[:row_limit]:
+        lines.append(
+            f"{stats['op']:30s} {stats['calls']:8d} {stats['total_us'] / 1000:12.3f} "
+            f"{stats['mean_us']:12.1f} {stats['percent']:7.2f}"
+        )
+    return "\n".join(lines)
+
+
+def write_ort_summary(trace_path, row_limit=30):
+    """Write the per-operator table next to the trace and return its path."""
+    summary_path = os.path.splitext(trace_path)[0] + "_summary.txt"
+    table = format_summary(summarize_ort_trace(trace_path), row_limit=row_limit)
+    with open(summary_path, "w") as f:
+        f.write(table + "\n")
+    logger.info(f"ONNX Runtime profile summary written to {summary_path}")
+    return summary_path
@@ -0,0 +1,80 @@
+import os
+import json
+import logging
+
+import pytorch_lightning as pl
+
+logger = logging.getLogger(__name__)
+
+INTERMEDIATE_FILE = "intermediate.jsonl"
+PRUNED_MARKER = "PRUNED"
+
+
+class SweepPruningCallback(pl.Callback):
+    """
+    Reports valid/loss after every validation epoch to the sweep directory and
+    stops the trial when its best loss so far is worse than the median of the
+    other trials at the same epoch.
+    """
+
+    def __init__(self, sweep_dir, trial_id, warmup_epochs=1, min_trials=3):
+        self.sweep_dir = sweep_dir
+        self.trial_id = trial_id
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+
+    def _report(self, record):
+        # Single short appends are atomic, so trials can share one file
+        with open(os.path.join(self.sweep_dir, INTERMEDIATE_FILE), "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def on_validation_epoch_end(self, trainer, pl_module):
+        if trainer.sanity_checking or "valid/loss" not in trainer.callback_metrics:
+            return
+
+        epoch = trainer.current_epoch
+        metrics = trainer.callback_metrics
+        self._report(
+            {
+                "trial": self.trial_id,
+                "epoch": epoch,
+                "loss": float(metrics["valid/loss"]),
+                "acc": float(metrics["valid/acc"]) if "valid/acc" in metrics else None,
+            }
+        )
+        if epoch + 1 < self.warmup_epochs:
+            return
+
+        best = best_losses_by_epoch(self.sweep_dir, epoch)
+        own = best.pop(self.trial_id, None)
+        if own is None or len(best) < self.min_trials:
+            return
+
+        others = sorted(best.values())
+        median = others[len(others) // 2]
+        if own > median:
+            logger.info(
+                f"Pruning trial {self.trial_id} at epoch {epoch}: "
+                f"valid/loss {own:.4f} > median {median:.4f}"
+            )
+            open(os.path.join(os.getcwd(), PRUNED_MARKER), "w").close()
+            trainer.should_stop = True
+
+
+def read_intermediate(sweep_dir):
+    path = os.path.join(sweep_dir, INTERMEDIATE_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def best_losses_by_epoch(sweep_dir, epoch):
+    """Best valid/loss per trial over epochs <= `epoch`, for trials that reached it."""
+    records = read_intermediate(sweep_dir)
+    reached = {r["trial"] for r in records if r["epoch"] >= epoch}
+    best = {}
+    for r in records:
+        if r["trial"] in reached and r["epoch"] <= epoch:
+            best[r["trial"]] = min(best.get(r["trial"], float("inf")), r["loss"])
+    return best
@@ -0,0 +1,205 @@
+import os
+import time
+import asyncio
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper edges (ms) of the latency histogram bins; the last bin is open-ended
+LATENCY_BINS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+DEFAULT_BUCKET_EDGES = (32, 64, 128, 256, 512)
+
+
+def threads_per_run(
+    num_buckets=len(DEFAULT_BUCKET_EDGES), workers_per_bucket=1, processes=1
+):
+    """
+    Intra-op threads to give each model run so that every bucket running
+    `workers_per_bucket` batches at once, in each of `processes` server
+    workers, doesn't oversubscribe the CPU.
+    """
+    concurrent_runs = num_buckets * workers_per_bucket * processes
+    return max(1, (os.cpu_count() or 1) // concurrent_runs)
+
+
+class LatencyHistogram:
+    def __init__(self, bins_ms=LATENCY_BINS_MS):
+        self.bins_ms = list(bins_ms)
+        self.counts = [0] * (len(self.bins_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, latency_ms):
+        self.counts[bisect.bisect_left(self.bins_ms, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+
+    def percentile(self, q):
+        """Upper edge of the bin holding the q-th percentile (inf if in the last bin)."""
+        if self.count == 0:
+            return None
+        target = q / 100 * self.count
+        seen = 0
+        for edge, count in zip(self.bins_ms + [float("inf")], self.counts):
+            seen += count
+            if seen >= target:
+                return edge
+        return float("inf")
+
+    def to_dict(self):
+        labels = [f"<={edge}ms" for edge in self.bins_ms] + [f">{self.bins_ms[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "histogram": dict(zip(labels, self.counts)),
+        }
+
+
+class _Bucket:
+    def __init__(self, max_tokens, max_wait_s, num_workers):
+        self.max_tokens = max_tokens
+        self.max_wait_s = max_wait_s
+        # Each bucket runs its batches on its own threads, so a long batch
+        # never occupies the worker a short bucket is waiting for
+        self.executor = ThreadPoolExecutor(max_workers=num_workers)
+        self.pending = []
+        self.timer = None
+        self.num_batches = 0
+        self.total_batch_size = 0
+        self.latency = LatencyHistogram()
+
+
+class TokenBudgetScheduler:
+    """
+    Groups incoming sentence pairs into sequence-length buckets and dispatches
+    each bucket as soon as its padded token count reaches `token_budget`, or
+    when its oldest request has waited `max_wait_ms`, whichever comes first.
+
+    Since every pair in a bucket pads to at most the bucket's upper edge, a
+    batch costs roughly len(batch) * edge tokens, and since each bucket has
+    its own workers, short pairs never wait behind (or get padded up to)
+    long ones.
+
+    Each request is tokenized once, without padding, on a dedicated thread;
+    batches are then padded by the predictor's predict_encoded().
+
+    Up to len(bucket_edges) * workers_per_bucket model runs can execute at
+    once, so the predictor's intra-op threads should be limited accordingly
+    (see threads_per_run()) or the runs will contend for the same cores.
+    """
+
+    def __init__(
+        self,
+        predictor,
+        token_budget=4096,
+        bucket_edges=DEFAULT_BUCKET_EDGES,
+        max_wait_ms=5,
+        workers_per_bucket=1,
+    ):
+        """
+        - **predictor**: OnnxInference / Inference (anything with encode and predict_encoded)
+        - **token_budget**: max padded tokens per dispatched batch
+        - **bucket_edges**: sequence-length upper bounds; the last one should be >= max_length
+        - **max_wait_ms**: per-bucket deadline, a single value or one per bucket
+        - **workers_per_bucket**: batches of the same bucket that may run concurrently
+        """
+        self.predictor = predictor
+        self.token_budget = token_budget
+        self.bucket_edges = list(bucket_edges)
+
+        if isinstance(max_wait_ms, (int, float)):
+            max_wait_ms = [max_wait_ms] * len(self.bucket_edges)
+        self.buckets = [
+            _Bucket(edge, wait / 1000, workers_per_bucket)
+            for edge, wait in zip(self.bucket_edges, max_wait_ms)
+        ]
+        # A single tokenizer thread keeps tokenization off the event loop and
+        # never uses the shared tokenizer from two threads at once
+        self.encode_executor = ThreadPoolExecutor(max_workers=1)
+
+    def _bucket_for(self, features):
+        index = min(
+            bisect.bisect_left(self.bucket_edges, len(features["input_ids"])),
+            len(self.buckets) - 1,
+        )
+        return self.buckets[index]
+
+    async def submit(self, sentence1, sentence2):
+        """Queue one pair and wait for its [{"label", "score"}, ...] result."""
+        loop = asyncio.get_running_loop()
+        arrived = time.perf_counter()
+        features = (
+            await loop.run_in_executor(
+                self.encode_executor, self.predictor.encode, [(sentence1, sentence2)]
+            )
+        )[0]
+        bucket = self._bucket_for(features)
+        future = loop.create_future()
+        bucket.pending.append((features, future, arrived))
+
+        if len(bucket.pending) * bucket.max_tokens >= self.token_budget:
+            self._dispatch(bucket)
+        elif bucket.timer is None:
+            bucket.timer = loop.call_later(bucket.max_wait_s, self._dispatch, bucket)
+
+        return await future
+
+    def _dispatch(self, bucket):
+        if bucket.timer is not None:
+            bucket.timer.cancel()
+            bucket.timer = None
+        if not bucket.pending:
+            return
+
+        batch_size = max(1, self.token_budget // bucket.max_tokens)
+        batch, bucket.pending = bucket.pending[:batch_size], bucket.pending[batch_size:]
+        loop = asyncio.get_running_loop()
+        loop.create_task(self._run(bucket, batch))
+
+        if bucket.pending:
+            # Re-arm against the oldest request still waiting
+            waited = time.perf_counter() - bucket.pending[0][2]
+            bucket.timer = loop.call_later(
+                max(0.0, bucket.max_wait_s - waited), self._dispatch, bucket
+            )
+
+    async def _run(self, bucket, batch):
+        batch_features = [features for features, _, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                bucket.executor, self.predictor.predict_encoded, batch_features
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        now = time.perf_counter()
+        bucket.num_batches += 1
+        bucket.total_batch_size += len(batch)
+        for (_, future, enqueued), result in zip(batch, results):
+            bucket.latency.observe((now - enqueued) * 1000)
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "token_budget": self.token_budget,
+            "buckets": {
+                f"<={bucket.max_tokens}": {
+                    "pending": len(bucket.pending),
+                    "batches": bucket.num_batches,
+                    "mean_batch_size": (
+                        bucket.total_batch_size / bucket.num_batches
+                        if bucket.num_batches
+                        else None
+                    ),
+                    "latency": bucket.latency.to_dict(),
+                }
+                for bucket in self.buckets
+            },
+        }
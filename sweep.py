@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import time
+import glob
+import logging
+import itertools
+import subprocess
+
+import hydra
+from hydra.core.override_parser.overrides_parser import OverridesParser
+
+from pruning import PRUNED_MARKER, read_intermediate
+
+logger = logging.getLogger(__name__)
+
+
+def expand_grid(params):
+    """Expand Hydra multirun overrides (e.g. model=bert,roberta) into trials."""
+    overrides = OverridesParser.create().parse_overrides(list(params))
+    choices = []
+    for override in overrides:
+        key = override.get_key_element()
+        if override.is_sweep_override():
+            values = list(override.sweep_string_iterator())
+        else:
+            values = [override.get_value_element_as_str()]
+        choices.append([f"{key}={value}" for value in values])
+    return [list(trial) for trial in itertools.product(*choices)]
+
+
+def max_parallel_trials(cfg, uses_gpu=False):
+    cpu_budget = cfg.cpu_budget or os.cpu_count()
+    limits = [cpu_budget // cfg.cpus_per_trial]
+    if uses_gpu:
+        # The CPU/memory budget says nothing about GPU memory
+        limits.append(cfg.max_gpu_trials)
+
+    memory_budget_gb = cfg.memory_budget_gb
+    if memory_budget_gb is None:
+        try:
+            import psutil
+
+            memory_budget_gb = psutil.virtual_memory().available / 1024**3
+        except ImportError:
+            pass
+    if memory_budget_gb is not None:
+        limits.append(int(memory_budget_gb // cfg.memory_per_trial_gb))
+    return max(1, min(limits))
+
+
+def build_cache(trial_cfgs, cache_dir):
+    """Tokenize each (tokenizer, max_length) pair once before trials start."""
+    from data import mrpcData
+
+    seen = set()
+    for trial_cfg in trial_cfgs:
+        key = (trial_cfg.model.model_name, trial_cfg.data.max_length)
+        if key in seen:
+            continue
+        seen.add(key)
+        logger.info(f"Caching tokenized dataset for {key[0]} (max_length={key[1]})")
+        mrpc_data = mrpcData(model_name=key[0], max_length=key[1], cache_dir=cache_dir)
+        mrpc_data.prepare_data()
+        mrpc_data.tokenized_dataset()
+
+
+def run_trials(trials, root_dir, sweep_dir, cfg, uses_gpu=False):
+    max_parallel = max_parallel_trials(cfg, uses_gpu=uses_gpu)
+    logger.info(f"Running {len(trials)} trials, {max_parallel} at a time")
+
+    env = {
+        **os.environ,
+        "OMP_NUM_THREADS": str(cfg.cpus_per_trial),
+        "MKL_NUM_THREADS": str(cfg.cpus_per_trial),
+        "TOKENIZERS_PARALLELISM": "false",
+    }
+    pending = list(enumerate(trials))
+    running = {}
+    return_codes = {}
+    try:
+        _run_trials_loop(
+            pending, running, return_codes, max_parallel, root_dir, sweep_dir, env
+        )
+    finally:
+        # On Ctrl-C or an error in the launcher, don't leave trials training
+        for trial_id, (process, log_file) in running.items():
+            if process.poll() is None:
+                logger.warning(f"Terminating trial {trial_id}")
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+            log_file.close()
+    return return_codes
+
+
+def _run_trials_loop(
+    pending, running, return_codes, max_parallel, root_dir, sweep_dir, env
+):
+    while pending or running:
+        while pending and len(running) < max_parallel:
+            trial_id, overrides = pending.pop(0)
+            trial_dir = os.path.join(sweep_dir, f"trial_{trial_id}")
+            os.makedirs(trial_dir, exist_ok=True)
+            command = [
+                sys.executable,
+                os.path.join(root_dir, "train.py"),
+                *overrides,
+                f"hydra.run.dir={trial_dir}",
+                f"sweep.dir={sweep_dir}",
+                f"sweep.trial_id={trial_id}",
+            ]
+            logger.info(f"Starting trial {trial_id}: {' '.join(overrides)}")
+            log_file = open(os.path.join(trial_dir, "stdout.log"), "w")
+            try:
+                process = subprocess.Popen(
+                    command,
+                    cwd=root_dir,
+                    env=env,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                )
+            except Exception:
+                log_file.close()
+                raise
+            running[trial_id] = (process, log_file)
+
+        time.sleep(1)
+        for trial_id, (process, log_file) in list(running.items()):
+            if process.poll() is not None:
+                log_file.close()
+                return_codes[trial_id] = process.returncode
+                logger.info(f"Trial {trial_id} exited with code {process.returncode}")
+                del running[trial_id]
+
+
+def measure_onnx_latency(trial_dir, trial_cfg):
+    """Export the trial's best checkpoint to ONNX and time it on the built-in suite."""
+    from data import mrpcData
+    from to_onnx import export_to_onnx
+    from inference_onnx import OnnxInference
+    from evaluation import evaluate, load_test_cases
+
+    checkpoints = glob.glob(os.path.join(trial_dir, "models", "*.ckpt"))
+    if not checkpoints:
+        return None
+
+    onnx_path = os.path.join(trial_dir, "models", "mrpc_model.onnx")
+    export_to_onnx(
+        checkpoints[0],
+        onnx_path,
+        mrpcData(
+            model_name=trial_cfg.model.model_name,
+            max_length=trial_cfg.data.max_length,
+        ),
+    )
+    predictor = OnnxInference(
+        onnx_path,
+        model_name=trial_cfg.model.model_name,
+        max_length=trial_cfg.data.max_length,
+    )
+    report = evaluate(predictor, load_test_cases(), batch_size=1)
+    return {
+        "latency_ms_mean": report["latency"]["example_ms_mean"],
+        "latency_ms_p99": report["latency"]["batch_ms_p99"],
+        "suite_accuracy": report["overall"]["accuracy"],
+    }
+
+
+def mark_frontier(results):
+    """Flag trials not beaten on both valid/acc and ONNX latency by another trial."""
+    candidates = [
+        r
+        for r in results
+        if r["valid_acc"] is not None
+        and r["onnx"] is not None
+        and "latency_ms_mean" in r["onnx"]
+    ]
+    for r in results:
+        r["frontier"] = False
+    for r in candidates:
+        r["frontier"] = not any(
+            other["valid_acc"] >= r["valid_acc"]
+            and other["onnx"]["latency_ms_mean"] <= r["onnx"]["latency_ms_mean"]
+            and (
+                other["valid_acc"] > r["valid_acc"]
+                or other["onnx"]["latency_ms_mean"] < r["onnx"]["latency_ms_mean"]
+            )
+            for other in candidates
+        )
+
+
+def format_summary(results):
+    lines = [
+        f"{'Rank':>4s}  {'Status':9s} {'valid/loss':>10s} {'valid/acc':>9s} "
+        f"{'ONNX ms':>8s} {'Frontier':>8s}  Overrides",
+        "-" * 100,
+    ]
+    for rank, r in enumerate(results, 1):
+        loss = "-" if r["valid_loss"] is None else f"{r['valid_loss']:.4f}"
+        acc = "-" if r["valid_acc"] is None else f"{r['valid_acc']:.4f}"
+        if r["onnx"] is None:
+            latency = "-"
+        elif "error" in r["onnx"]:
+            latency = "error"
+        else:
+            latency = f"{r['onnx']['latency_ms_mean']:.2f}"
+        frontier = "*" if r.get("frontier") else ""
+        lines.append(
+            f"{rank:4d}  {r['status']:9s} {loss:>10s} {acc:>9s} {latency:>8s} "
+            f"{frontier:>8s}  {' '.join(r['overrides'])}"
+        )
+    return "\n".join(lines)
+
+
+def write_summary(sweep_dir, results):
+    with open(os.path.join(sweep_dir, "summary.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    table = format_summary(results)
+    with open(os.path.join(sweep_dir, "summary.txt"), "w") as f:
+        f.write(table + "\n")
+    return table
+
+
+@hydra.main(config_path="configs", config_name="config")
+def main(cfg):
+    root_dir = hydra.utils.get_original_cwd()
+    sweep_dir = os.getcwd()
+    sweep_cfg = cfg.sweep
+
+    cache_dir = os.path.join(root_dir, sweep_cfg.cache_dir)
+    grid = expand_grid(sweep_cfg.params)
+    trials = [
+        [*overrides, *sweep_cfg.trial_overrides, f"data.cache_dir={cache_dir}"]
+        for overrides in grid
+    ]
+    trial_cfgs = [
+        hydra.compose(config_name="config", overrides=overrides) for overrides in trials
+    ]
+    build_cache(trial_cfgs, cache_dir)
+
+    uses_gpu = any(c.trainer.accelerator == "gpu" for c in trial_cfgs)
+    return_codes = run_trials(trials, root_dir, sweep_dir, sweep_cfg, uses_gpu)
+
+    records = read_intermediate(sweep_dir)
+    results = []
+    for trial_id, overrides in enumerate(grid):
+        trial_dir = os.path.join(sweep_dir, f"trial_{trial_id}")
+        trial_records = [r for r in records if r["trial"] == trial_id]
+        best = min(trial_records, key=lambda r: r["loss"], default=None)
+
+        if return_codes.get(trial_id) != 0:
+            status = "failed"
+        elif os.path.exists(os.path.join(trial_dir, PRUNED_MARKER)):
+            status = "pruned"
+        else:
+            status = "completed"
+
+        results.append(
+            {
+                "trial": trial_id,
+                "overrides": overrides,
+                "status": status,
+                "epochs": len(trial_records),
+                "valid_loss": best["loss"] if best else None,
+                "valid_acc": best["acc"] if best else None,
+                "onnx": None,
+                "frontier": False,
+            }
+        )
+
+    status_order = {"completed": 0, "pruned": 1, "failed": 2}
+    results.sort(
+        key=lambda r: (
+            status_order[r["status"]],
+            r["valid_loss"] if r["valid_loss"] is not None else float("inf"),
+        )
+    )
+    # Keep the accuracy ranking even if the export/timing stage fails
+    write_summary(sweep_dir, results)
+
+    # Only completed trials are worth exporting and timing
+    for r in results:
+        if r["status"] != "completed":
+            continue
+        trial_dir = os.path.join(sweep_dir, f"trial_{r['trial']}")
+        try:
+            r["onnx"] = measure_onnx_latency(trial_dir, trial_cfgs[r["trial"]])
+        except Exception as e:
+            logger.exception(f"ONNX export/timing failed for trial {r['trial']}")
+            r["onnx"] = {"error": str(e)}
+
+    mark_frontier(results)
+    table = write_summary(sweep_dir, results)
+    logger.info("\n" + table)
+
+
+if __name__ == "__main__":
+    main()
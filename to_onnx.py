@@ -8,26 +8,24 @@ logger = logging.getLogger(__name__)
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
 
-@hydra.main(config_path="configs", config_name="config")
-def convert_to_onnx(cfg):
-    root_dir = hydra.utils.get_original_cwd()
-    logger.info(f"Root directory: {root_dir}")
-    model_path = f"{root_dir}/models/best_checkpoint.ckpt"
+def export_to_onnx(model_path, onnx_path, mrpc_data):
+    """
+    Export the checkpoint at `model_path` to `onnx_path`, tracing it with a
+    sample tokenized by `mrpc_data`'s tokenizer.
+    """
     logger.info(f"Loading model from: {model_path}")
     mrpc_model = mrpcModel.load_from_checkpoint(model_path).to(device)
+    mrpc_model.eval()
 
-    mrpc_data = mrpcData(
-        model_name=cfg.model.model_name,
-        batch_size=cfg.data.batch_size,
-        max_length=cfg.data.max_length,
+    tokenized_sample = mrpc_data.tokenize_data(
+        {
+            "sentence1": ["The firm announced increased earnings."],
+            "sentence2": ["The company reported higher profits."],
+        }
     )
-
-    mrpc_data.prepare_data()
-    mrpc_data.setup()
-    input_batch = next(iter(mrpc_data.train_dataloader()))
     input_sample = {
-        "input_ids": input_batch["input_ids"][0].unsqueeze(0).to(device),
-        "attention_mask": input_batch["attention_mask"][0].unsqueeze(0).to(device),
+        "input_ids": torch.tensor(tokenized_sample["input_ids"]).to(device),
+        "attention_mask": torch.tensor(tokenized_sample["attention_mask"]).to(device),
     }
 
     logger.info("Converting model to ONNX format...")
@@ -37,7 +35,7 @@ def convert_to_onnx(cfg):
             input_sample["input_ids"],
             input_sample["attention_mask"],
         ),
-        f"{root_dir}/models/mrpc_model.onnx",
+        onnx_path,
         input_names=["input_ids", "attention_mask"],
         output_names=["output"],
         dynamic_axes={
@@ -45,7 +43,26 @@ def convert_to_onnx(cfg):
             "attention_mask": {0: "batch_size", 1: "sequence_length"},
             "output": {0: "batch_size"},
         },
-        opset_version=10,
+        # RoBERTa builds position ids with cumsum, which needs opset >= 11
+        opset_version=14,
+    )
+
+
+@hydra.main(config_path="configs", config_name="config")
+def convert_to_onnx(cfg):
+    root_dir = hydra.utils.get_original_cwd()
+    logger.info(f"Root directory: {root_dir}")
+
+    mrpc_data = mrpcData(
+        model_name=cfg.model.model_name,
+        batch_size=cfg.data.batch_size,
+        max_length=cfg.data.max_length,
+    )
+
+    export_to_onnx(
+        f"{root_dir}/models/best_checkpoint.ckpt",
+        f"{root_dir}/models/mrpc_model.onnx",
+        mrpc_data,
     )
 
     logger.info("Model successfully converted to ONNX format and saved.")
@@ -4,9 +4,11 @@ import os
 import pytorch_lightning as pl
 from pytorch_lightning.callbacks import ModelCheckpoint, EarlyStopping
 from pytorch_lightning.loggers import WandbLogger
+from pytorch_lightning.profilers import PyTorchProfiler
 
 from data import mrpcData
 from model import mrpcModel
+from pruning import SweepPruningCallback
 
 import hydra
 from omegaconf.omegaconf import OmegaConf
@@ -34,8 +36,13 @@ def main(cfg):
         model_name=cfg.model.model_name,
         batch_size=cfg.data.batch_size,
         max_length=cfg.data.max_length,
+        cache_dir=(
+            hydra.utils.to_absolute_path(cfg.data.cache_dir)
+            if cfg.data.cache_dir
+            else None
+        ),
     )
-    mrpc_model = mrpcModel(model_name=cfg.model.model_name)
+    mrpc_model = mrpcModel(model_name=cfg.model.model_name, lr=cfg.model.lr)
 
     checkpoint_callback = ModelCheckpoint(
         dirpath="./models",
@@ -48,18 +55,51 @@ def main(cfg):
     early_stopping_callback = EarlyStopping(
         monitor="valid/loss", patience=3, mode="min"
     )
+    callbacks = [checkpoint_callback, early_stopping_callback]
+    if cfg.sweep.dir is not None and cfg.sweep.pruning.enabled:
+        callbacks.append(
+            SweepPruningCallback(
+                sweep_dir=cfg.sweep.dir,
+                trial_id=cfg.sweep.trial_id,
+                warmup_epochs=cfg.sweep.pruning.warmup_epochs,
+                min_trials=cfg.sweep.pruning.min_trials,
+            )
+        )
+
     wandb_logger = WandbLogger(
         project=cfg.trainer.project,
         entity=cfg.trainer.entity,
         name=cfg.trainer.name,
     )
+    profiler = None
+    if cfg.profiler.enabled:
+        # Hydra has already chdir'd into the run directory, so traces and the
+        # per-operator summary land next to train.log
+        profiler = PyTorchProfiler(
+            dirpath=os.getcwd(),
+            filename=cfg.profiler.filename,
+            export_to_chrome=True,
+            row_limit=cfg.profiler.row_limit,
+            sort_by_key=cfg.profiler.sort_by_key,
+            record_shapes=cfg.profiler.record_shapes,
+            profile_memory=cfg.profiler.profile_memory,
+            schedule=torch.profiler.schedule(
+                wait=cfg.profiler.wait,
+                warmup=cfg.profiler.warmup,
+                active=cfg.profiler.active,
+                repeat=cfg.profiler.repeat,
+            ),
+        )
+        logger.info(f"Profiling enabled, traces will be written to {os.getcwd()}")
+
     trainer = pl.Trainer(
         logger=wandb_logger,
+        profiler=profiler,
         accelerator=cfg.trainer.accelerator,
         devices=cfg.trainer.devices,
         max_epochs=cfg.trainer.max_epochs,
         log_every_n_steps=cfg.trainer.log_every_n_steps,
-        callbacks=[checkpoint_callback, early_stopping_callback],
+        callbacks=callbacks,
     )
     trainer.fit(mrpc_model, mrpc_data)
 